@@ -1,22 +1,22 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
 
 from data_loader import load_crime_data
 from utils import (
+    DAY_ORDER,
     apply_time_filter,
-    get_overview_metrics,
+    build_cluster_index,
     filter_by_cluster,
-    top_crime_types,
     arrest_rate,
-    get_cluster_hotspots,
-    get_daily_crime_trend,
-    get_hour_crime_distribution,
-    get_day_week_distribution,
-    get_arrest_statistics,
-    get_location_stats
+    get_location_stats,
+    rasterize_points,
+    sample_points,
+    get_spatial_bins,
+    get_grid_geojson,
+    build_aggregates
 )
 
 # ============================================================================
@@ -113,11 +113,64 @@ st.markdown("""
 # LOAD DATA
 # ============================================================================
 
+# load_crime_data is an st.cache_resource, so every session shares this frame
+df = load_crime_data()
+
+@st.cache_resource
+def cluster_index():
+    return build_cluster_index(df)
+
+# Filtered frames are cached as resources too, so reruns reuse them rather than
+# unpickling a copy; like df they are read-only and must not be modified in place
+@st.cache_resource
+def get_filtered(time_window, cluster_choice):
+    return filter_by_cluster(apply_time_filter(df, time_window), cluster_choice, cluster_index())
+
+@st.cache_data
+def cluster_options(time_window):
+    clusters = get_filtered(time_window, "All")["st_cluster"]
+    present = clusters.cat.categories[np.unique(clusters.cat.codes.to_numpy())]
+    return present[present != -1].tolist()
+
 @st.cache_data
-def cached_load_data():
-    return load_crime_data()
+def live_aggregates(time_window, cluster_choice):
+    return build_aggregates(get_filtered(time_window, cluster_choice))
+
+TIME_WINDOWS = [7, 14, 30, 90, 180, 365]
+
+@st.cache_resource
+def precompute_aggregates():
+    precomp = {}
+    for tw in TIME_WINDOWS:
+        clusters = cluster_options(tw)
+        # With many hotspots only the most used windows are worth precomputing
+        if len(clusters) >= 50 and tw not in (7, 30):
+            continue
+        for c in ["All", *clusters]:
+            precomp[(tw, c)] = build_aggregates(get_filtered(tw, c))
+    return precomp
+
+def get_all_aggregates(time_window, cluster_choice):
+    precomp = precompute_aggregates()
+    if (time_window, cluster_choice) in precomp:
+        return precomp[(time_window, cluster_choice)]
+    return live_aggregates(time_window, cluster_choice)
 
-df = cached_load_data()
+@st.cache_data
+def density_grid(time_window, cluster_choice):
+    # Only needed for the Density Grid map layer, so built on first use
+    spatial_bins = get_spatial_bins(get_filtered(time_window, cluster_choice))
+    return spatial_bins, get_grid_geojson(spatial_bins)
+
+# Above this many points the map is rasterized instead of drawn marker by marker
+MAP_RASTER_THRESHOLD = 20_000
+
+@st.cache_data
+def density_layer(time_window, cluster_choice):
+    # The density image plus a sparse point sample drawn over it for hover
+    df_filtered = get_filtered(time_window, cluster_choice)
+    img, coordinates = rasterize_points(df_filtered, cmap=px.colors.sequential.Plasma)
+    return img, coordinates, sample_points(df_filtered, 2000)
 
 # ============================================================================
 # HEADER SECTION
@@ -146,7 +199,7 @@ with st.sidebar:
     st.markdown("### ⏰ Time Period")
     time_window = st.selectbox(
         "Analysis Window",
-        [7, 14, 30, 90, 180, 365],
+        TIME_WINDOWS,
         index=2,
         format_func=lambda x: f"Last {x} days"
     )
@@ -155,8 +208,7 @@ with st.sidebar:
     
     # Hotspot selection
     st.markdown("### 🎯 Hotspot Selection")
-    df_time = apply_time_filter(df, time_window)
-    clusters = sorted([c for c in df_time["st_cluster"].unique() if c != -1])
+    clusters = cluster_options(time_window)
     
     cluster_choice = st.selectbox(
         "Select Hotspot",
@@ -164,7 +216,7 @@ with st.sidebar:
         format_func=lambda x: f"Hotspot {x}" if x != "All" else "All Hotspots"
     )
     
-    df_filtered = filter_by_cluster(df_time, cluster_choice)
+    df_filtered = get_filtered(time_window, cluster_choice)
     
     st.markdown("---")
     
@@ -182,8 +234,9 @@ with st.sidebar:
 
 st.markdown("## 📈 Key Metrics")
 
-total, hotspots, noise_pct = get_overview_metrics(df_filtered)
-arrests_stats = get_arrest_statistics(df_filtered)
+aggregates = get_all_aggregates(time_window, cluster_choice)
+total, hotspots, noise_pct = aggregates["overview"]
+arrests_stats = aggregates["arrest_stats"]
 
 metric_cols = st.columns(5)
 
@@ -235,6 +288,18 @@ if total == 0:
     st.warning("⚠️ No crime data available for the selected filters.")
     st.stop()
 
+def chart_layout(title, xaxis_title, yaxis_title, height=400, hovermode="closest"):
+    # Shared layout for the charts built directly with graph_objects
+    return dict(
+        title=title,
+        height=height,
+        xaxis=dict(title=xaxis_title),
+        yaxis=dict(title=yaxis_title),
+        hovermode=hovermode,
+        showlegend=False,
+        font=dict(family="Segoe UI", size=11)
+    )
+
 # Create tabs for better organization
 tab1, tab2, tab3, tab4 = st.tabs([
     "🗺️ Spatial Analysis",
@@ -247,348 +312,475 @@ tab1, tab2, tab3, tab4 = st.tabs([
 # TAB 1: SPATIAL ANALYSIS
 # ============================================================================
 
-with tab1:
+def grid_map_figure(spatial_bins, spatial_grid):
+    fig = px.choropleth_mapbox(
+        spatial_bins,
+        geojson=spatial_grid,
+        locations="cell_id",
+        color="count",
+        color_continuous_scale="Viridis",
+        hover_data={"cell_id": False, "count": True, "arrest_rate": ":.1f"},
+        labels={"count": "Crimes", "arrest_rate": "Arrest Rate (%)"},
+        center={"lat": spatial_bins["latitude"].mean(), "lon": spatial_bins["longitude"].mean()},
+        zoom=9,
+        opacity=0.6,
+        height=600,
+        title="Crime Density Grid"
+    )
+    
+    fig.update_traces(marker_line_width=0)
+    
+    fig.update_layout(
+        mapbox_style="carto-positron",
+        margin=dict(l=0, r=0, t=30, b=0),
+        font=dict(family="Segoe UI", size=12)
+    )
+    
+    return fig
+
+def centroid_map_figure(hotspots, noise):
+    fig = go.Figure(
+        [
+            # Noise is context only: faint, and skipped by hover and click selection
+            go.Scattermapbox(
+                lat=noise["latitude"],
+                lon=noise["longitude"],
+                mode="markers",
+                marker=dict(size=3, color="#7f7f7f", opacity=0.3),
+                hoverinfo="skip",
+                name="Noise"
+            ),
+            go.Scattermapbox(
+                lat=hotspots["latitude"],
+                lon=hotspots["longitude"],
+                mode="markers",
+                marker=dict(
+                    size=hotspots["count"],
+                    sizemode="area",
+                    sizeref=2 * hotspots["count"].max() / 40 ** 2,
+                    sizemin=6,
+                    color=hotspots["count"],
+                    colorscale="Viridis",
+                    colorbar=dict(title="Crimes")
+                ),
+                customdata=np.column_stack([hotspots["st_cluster"].astype(int), hotspots["arrest_rate"]]),
+                hovertemplate=
+                "<b>Hotspot %{customdata[0]}</b><br>" +
+                "Crimes: %{marker.color}<br>" +
+                "Arrest Rate: %{customdata[1]:.1f}%<extra></extra>",
+                name="Hotspots"
+            )
+        ]
+    )
+    
+    fig.update_layout(
+        title="Hotspot Centroids",
+        height=600,
+        showlegend=False,
+        mapbox=dict(
+            style="carto-positron",
+            center={"lat": hotspots["latitude"].mean(), "lon": hotspots["longitude"].mean()},
+            zoom=9
+        ),
+        margin=dict(l=0, r=0, t=30, b=0),
+        font=dict(family="Segoe UI", size=12)
+    )
+    
+    return fig
+
+@st.fragment
+def render_tab1(df_filtered, aggregates, time_window, cluster_choice):
     col1, col2 = st.columns([2, 1])
     
     with col1:
         st.markdown("### Hotspot Locations Map")
         
-        # Create enhanced map with clusters highlighted
-        fig_map = px.scatter_mapbox(
-            df_filtered,
-            lat="latitude",
-            lon="longitude",
-            color="st_cluster",
-            hover_data={
-                "primary_type": True,
-                "hour": True,
-                "arrest": True,
-                "st_cluster": True
-            },
-            hover_name="primary_type",
-            zoom=9,
-            height=600,
-            color_continuous_scale="Viridis",
-            title="Crime Hotspots Distribution"
-        )
-        
-        fig_map.update_traces(
-            hovertemplate=
-            "<b>%{hovertext}</b><br>" +
-            "Latitude: %{lat:.4f}<br>" +
-            "Longitude: %{lon:.4f}<br>" +
-            "Hour: %{customdata[1]}<br>" +
-            "Arrested: %{customdata[2]}<br>" +
-            "Cluster: %{customdata[3]}<extra></extra>"
-        )
-        
-        fig_map.update_layout(
-            mapbox_style="carto-positron",
-            margin=dict(l=0, r=0, t=30, b=0),
-            font=dict(family="Segoe UI", size=12),
-            plot_bgcolor="white"
+        map_layer = st.radio(
+            "Map Layer",
+            ["Incidents", "Hotspot Centroids", "Density Grid"],
+            horizontal=True,
+            help="Hotspot Centroids draws one marker per hotspot sized by its crime count; "
+                 "Density Grid draws one cell per ~500 m square instead of one marker per crime"
         )
-        
-        st.plotly_chart(fig_map, use_container_width=True)
+        selected_hotspots = []
+        show_centroids = map_layer == "Hotspot Centroids" and not aggregates["hotspots"].empty
+        
+        if map_layer == "Hotspot Centroids" and not show_centroids:
+            st.info("No hotspots in this selection to draw as centroids; showing individual incidents instead.")
+        
+        if show_centroids:
+            # Noise rows come from the cluster index rather than a scan of every row;
+            # a single-hotspot selection has none
+            if cluster_choice == "All" and -1 in cluster_index():
+                noise = filter_by_cluster(df_filtered, -1, cluster_index())
+            else:
+                noise = df_filtered.iloc[:0]
+            noise = noise.sample(min(5000, len(noise)), random_state=0)
+            fig_map = centroid_map_figure(aggregates["hotspots"], noise)
+        elif map_layer == "Density Grid":
+            fig_map = grid_map_figure(*density_grid(time_window, cluster_choice))
+        else:
+            # Large selections are drawn as a single density image; a sparse
+            # sample of points is kept on top so hover still works
+            use_raster = len(df_filtered) > MAP_RASTER_THRESHOLD
+            if use_raster:
+                density_img, img_coords, map_df = density_layer(time_window, cluster_choice)
+            else:
+                map_df = df_filtered
+            # Hover shows 4 decimals, so nothing finer needs to reach the browser.
+            # Round in float64: float32 values serialize with spurious trailing digits
+            map_df = map_df.assign(
+                latitude=map_df["latitude"].astype("float64").round(4),
+                longitude=map_df["longitude"].astype("float64").round(4)
+            )
+            
+            # Create enhanced map with clusters highlighted
+            fig_map = px.scatter_mapbox(
+                map_df,
+                lat="latitude",
+                lon="longitude",
+                color=map_df["st_cluster"].astype(int),
+                hover_data={
+                    "primary_type": True,
+                    "hour": True,
+                    "arrest": True,
+                    "st_cluster": True
+                },
+                hover_name="primary_type",
+                zoom=9,
+                height=600,
+                color_continuous_scale="Viridis",
+                title="Crime Hotspots Distribution"
+            )
+            
+            fig_map.update_traces(
+                hovertemplate=
+                "<b>%{hovertext}</b><br>" +
+                "Latitude: %{lat:.4f}<br>" +
+                "Longitude: %{lon:.4f}<br>" +
+                "Hour: %{customdata[1]}<br>" +
+                "Arrested: %{customdata[2]}<br>" +
+                "Cluster: %{customdata[3]}<extra></extra>"
+            )
+            
+            fig_map.update_layout(
+                mapbox_style="carto-positron",
+                margin=dict(l=0, r=0, t=30, b=0),
+                font=dict(family="Segoe UI", size=12),
+                plot_bgcolor="white"
+            )
+            
+            if use_raster:
+                fig_map.update_traces(marker=dict(size=4, opacity=0.4))
+                fig_map.update_layout(
+                    mapbox_layers=[{
+                        "sourcetype": "image",
+                        "source": density_img,
+                        "coordinates": img_coords,
+                        "opacity": 0.8
+                    }]
+                )
+        
+        if show_centroids:
+            # Clicking centroids narrows the details table to those hotspots
+            event = st.plotly_chart(fig_map, use_container_width=True, on_select="rerun", selection_mode="points")
+            selected_hotspots = [p["point_index"] for p in event.selection.points if p["curve_number"] == 1]
+        else:
+            st.plotly_chart(fig_map, use_container_width=True)
     
     with col2:
         st.markdown("### Hotspot Details")
         
-        hotspot_data = get_cluster_hotspots(df_filtered)
+        hotspot_data = aggregates["hotspots"]
+        hotspot_data = hotspot_data.iloc[selected_hotspots] if selected_hotspots else hotspot_data.head(5)
         
         if not hotspot_data.empty:
-            for idx, row in hotspot_data.head(5).iterrows():
-                with st.container():
-                    col_a, col_b = st.columns([1, 1])
-                    with col_a:
-                        st.metric(
-                            f"Hotspot {int(row['st_cluster'])}",
-                            f"{int(row['count'])} crimes",
-                            help=f"Lat: {row['latitude']:.4f}, Lon: {row['longitude']:.4f}"
-                        )
-                    with col_b:
-                        st.metric(
-                            "Arrest Rate",
-                            f"{row['arrest_rate']:.1f}%"
-                        )
-                    st.divider()
+            hotspot_display = (
+                hotspot_data
+                .assign(hotspot=lambda d: "Hotspot " + d["st_cluster"].astype(str))
+                [["hotspot", "count", "arrest_rate", "latitude", "longitude"]]
+                .rename(columns={
+                    "hotspot": "Hotspot",
+                    "count": "Crimes",
+                    "arrest_rate": "Arrest Rate",
+                    "latitude": "Lat",
+                    "longitude": "Lon"
+                })
+            )
+            
+            st.dataframe(
+                hotspot_display.style.format({"Arrest Rate": "{:.1f}%", "Lat": "{:.4f}", "Lon": "{:.4f}"}),
+                use_container_width=True,
+                hide_index=True
+            )
+
+with tab1:
+    render_tab1(df_filtered, aggregates, time_window, cluster_choice)
 
 # ============================================================================
 # TAB 2: TEMPORAL PATTERNS
 # ============================================================================
 
-with tab2:
-    st.markdown("### Crime Intensity by Time of Day and Day of Week")
-    
-    # Prepare data for heatmap
-    df_filtered["day_name"] = df_filtered["date"].dt.day_name()
+# Figures only depend on the selection, so they are cached as plain dicts
+# (cheap to pickle) and rebuilt only when the time window or hotspot changes
+
+@st.cache_data
+def heatmap_figure(time_window, cluster_choice):
+    heatmap = get_all_aggregates(time_window, cluster_choice)["heatmap"]
+    
+    fig = go.Figure(
+        go.Heatmap(
+            z=heatmap,
+            x=list(range(24)),
+            y=DAY_ORDER,
+            colorscale="RdYlBu_r",
+            colorbar=dict(title="Crime Count"),
+            hovertemplate="Day: %{y}<br>Hour: %{x}<br>Crimes: %{z}<extra></extra>"
+        ),
+        layout=chart_layout("Crime Activity Heatmap", "Hour of Day (24h format)", "Day of Week", height=450)
+    )
     
-    heatmap_df = (
-        df_filtered
-        .groupby(["day_name", "hour"])
-        .size()
-        .reset_index(name="count")
+    return fig.to_dict()
+
+@st.cache_data
+def hour_figure(time_window, cluster_choice):
+    hour_dist = get_all_aggregates(time_window, cluster_choice)["hour_dist"]
+    
+    fig = go.Figure(
+        go.Bar(
+            x=hour_dist["hour"].to_numpy(),
+            y=hour_dist["count"].to_numpy(),
+            marker=dict(color=hour_dist["count"].to_numpy(), colorscale="Blues", showscale=True),
+            hovertemplate="Hour of Day: %{x}<br>Number of Crimes: %{y}<extra></extra>"
+        ),
+        layout=chart_layout("Crimes by Hour", "Hour of Day", "Crime Count", hovermode="x unified")
     )
     
-    # Reorder days
-    day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    heatmap_df["day_name"] = pd.Categorical(
-        heatmap_df["day_name"],
-        categories=day_order,
-        ordered=True
+    return fig.to_dict()
+
+@st.cache_data
+def day_figure(time_window, cluster_choice):
+    day_dist = get_all_aggregates(time_window, cluster_choice)["day_dist"]
+    
+    fig = go.Figure(
+        go.Bar(
+            x=day_dist["day_name"].to_numpy(),
+            y=day_dist["count"].to_numpy(),
+            marker=dict(color=day_dist["count"].to_numpy(), colorscale="Greens", showscale=True),
+            hovertemplate="Day of Week: %{x}<br>Number of Crimes: %{y}<extra></extra>"
+        ),
+        layout=chart_layout("Crimes by Day of Week", "Day of Week", "Crime Count", hovermode="x unified")
     )
-    heatmap_df = heatmap_df.sort_values(["day_name", "hour"])
-    
-    # Create heatmap
-    fig_heatmap = px.density_heatmap(
-        heatmap_df,
-        x="hour",
-        y="day_name",
-        z="count",
-        nbinsx=24,
-        nbinsy=7,
-        color_continuous_scale="RdYlBu_r",
-        labels={"count": "Crime Count", "hour": "Hour of Day", "day_name": "Day of Week"},
-        height=450,
-        title="Crime Activity Heatmap"
+    
+    return fig.to_dict()
+
+@st.cache_data
+def trend_figure(time_window, cluster_choice):
+    daily_trend = get_all_aggregates(time_window, cluster_choice)["daily_trend"]
+    
+    # One point per day, so even a 365-day window stays small enough to send whole
+    fig = go.Figure(
+        go.Scattergl(
+            x=daily_trend["date"].to_numpy(),
+            y=daily_trend["crimes"].to_numpy(),
+            mode="lines+markers",
+            name="Crimes",
+            line=dict(color="#667eea", width=3),
+            marker=dict(size=6, color="#667eea")
+        )
     )
     
-    fig_heatmap.update_layout(
-        xaxis_title="Hour of Day (24h format)",
-        yaxis_title="Day of Week",
-        coloraxis_colorbar=dict(title="Crime Count"),
-        font=dict(family="Segoe UI", size=11)
+    fig.update_layout(
+        height=400,
+        title="Crime Trend Over Time",
+        xaxis_title="Date",
+        yaxis_title="Crime Count",
+        hovermode="x unified",
+        font=dict(family="Segoe UI", size=11),
+        plot_bgcolor="rgba(240,240,240,0.5)"
     )
     
-    st.plotly_chart(fig_heatmap, use_container_width=True)
+    return fig.to_dict()
+
+@st.fragment
+def render_tab2(time_window, cluster_choice):
+    st.markdown("### Crime Intensity by Time of Day and Day of Week")
+    
+    st.plotly_chart(heatmap_figure(time_window, cluster_choice), use_container_width=True)
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("### Hourly Distribution")
         
-        hour_dist = get_hour_crime_distribution(df_filtered)
-        
-        fig_hour = px.bar(
-            hour_dist,
-            x="hour",
-            y="count",
-            labels={"hour": "Hour of Day", "count": "Number of Crimes"},
-            color="count",
-            color_continuous_scale="Blues",
-            height=400,
-            title="Crimes by Hour"
-        )
-        
-        fig_hour.update_layout(
-            xaxis_title="Hour of Day",
-            yaxis_title="Crime Count",
-            hovermode="x unified",
-            showlegend=False,
-            font=dict(family="Segoe UI", size=11)
-        )
-        
-        st.plotly_chart(fig_hour, use_container_width=True)
+        st.plotly_chart(hour_figure(time_window, cluster_choice), use_container_width=True)
     
     with col2:
         st.markdown("### Day of Week Distribution")
         
-        day_dist = get_day_week_distribution(df_filtered)
-        
-        fig_day = px.bar(
-            day_dist,
-            x="day_name",
-            y="count",
-            labels={"day_name": "Day of Week", "count": "Number of Crimes"},
-            color="count",
-            color_continuous_scale="Greens",
-            height=400,
-            title="Crimes by Day of Week"
-        )
-        
-        fig_day.update_layout(
-            xaxis_title="Day of Week",
-            yaxis_title="Crime Count",
-            hovermode="x unified",
-            showlegend=False,
-            font=dict(family="Segoe UI", size=11)
-        )
-        
-        st.plotly_chart(fig_day, use_container_width=True)
+        st.plotly_chart(day_figure(time_window, cluster_choice), use_container_width=True)
     
     st.markdown("### Daily Crime Trend")
     
-    daily_trend = get_daily_crime_trend(df_filtered)
+    st.plotly_chart(trend_figure(time_window, cluster_choice), use_container_width=True)
+
+with tab2:
+    render_tab2(time_window, cluster_choice)
+
+# ============================================================================
+# TAB 3: CRIME TYPES
+# ============================================================================
+
+@st.cache_data
+def crime_bar_figure(time_window, cluster_choice):
+    crime_df = get_all_aggregates(time_window, cluster_choice)["crime_df"].sort_values("crime_count", ascending=True)
+    
+    fig = px.bar(
+        crime_df,
+        y="crime_type",
+        x="crime_count",
+        orientation="h",
+        labels={"crime_type": "Crime Type", "crime_count": "Count"},
+        color="crime_count",
+        color_continuous_scale="Reds",
+        height=500,
+        title="Crime Frequency by Type"
+    )
     
-    fig_trend = px.line(
-        daily_trend,
-        x="date",
-        y="crimes",
-        markers=True,
-        labels={"date": "Date", "crimes": "Number of Crimes"},
-        height=400,
-        title="Crime Trend Over Time"
+    fig.update_layout(
+        xaxis_title="Number of Incidents",
+        yaxis_title="",
+        hovermode="y unified",
+        showlegend=False,
+        font=dict(family="Segoe UI", size=11)
     )
     
-    fig_trend.update_layout(
-        xaxis_title="Date",
-        yaxis_title="Crime Count",
-        hovermode="x unified",
-        font=dict(family="Segoe UI", size=11),
-        plot_bgcolor="rgba(240,240,240,0.5)"
+    return fig.to_dict()
+
+@st.cache_data
+def crime_pie_figure(time_window, cluster_choice):
+    top5_crimes = get_all_aggregates(time_window, cluster_choice)["crime_df"].nlargest(5, "crime_count")
+    
+    fig = px.pie(
+        top5_crimes,
+        names="crime_type",
+        values="crime_count",
+        hole=0.4,
+        title="Top 5 Crimes Distribution"
     )
     
-    fig_trend.update_traces(
-        line=dict(color="#667eea", width=3),
-        marker=dict(size=6, color="#667eea")
+    fig.update_traces(
+        textposition="inside",
+        textinfo="percent+label",
+        textfont=dict(size=11)
     )
     
-    st.plotly_chart(fig_trend, use_container_width=True)
-
-# ============================================================================
-# TAB 3: CRIME TYPES
-# ============================================================================
+    fig.update_layout(
+        height=500,
+        font=dict(family="Segoe UI", size=11)
+    )
+    
+    return fig.to_dict()
 
-with tab3:
+@st.fragment
+def render_tab3(aggregates, time_window, cluster_choice):
     st.markdown("### Crime Type Analysis")
     
-    crime_df = top_crime_types(df_filtered, top_n=10)
-    crime_df = crime_df.sort_values("crime_count", ascending=True)
+    crime_df = aggregates["crime_df"]
     
     col1, col2 = st.columns([1.5, 1])
     
     with col1:
         st.markdown("#### Top 10 Crime Types (Horizontal Bar)")
         
-        fig_bar = px.bar(
-            crime_df,
-            y="crime_type",
-            x="crime_count",
-            orientation="h",
-            labels={"crime_type": "Crime Type", "crime_count": "Count"},
-            color="crime_count",
-            color_continuous_scale="Reds",
-            height=500,
-            title="Crime Frequency by Type"
-        )
-        
-        fig_bar.update_layout(
-            xaxis_title="Number of Incidents",
-            yaxis_title="",
-            hovermode="y unified",
-            showlegend=False,
-            font=dict(family="Segoe UI", size=11)
-        )
-        
-        st.plotly_chart(fig_bar, use_container_width=True)
+        st.plotly_chart(crime_bar_figure(time_window, cluster_choice), use_container_width=True)
     
     with col2:
         st.markdown("#### Top 5 Crime Distribution (Pie)")
         
-        top5_crimes = crime_df.nlargest(5, "crime_count")
-        
-        fig_pie = px.pie(
-            top5_crimes,
-            names="crime_type",
-            values="crime_count",
-            hole=0.4,
-            title="Top 5 Crimes Distribution"
-        )
-        
-        fig_pie.update_traces(
-            textposition="inside",
-            textinfo="percent+label",
-            textfont=dict(size=11)
-        )
-        
-        fig_pie.update_layout(
-            height=500,
-            font=dict(family="Segoe UI", size=11)
-        )
-        
-        st.plotly_chart(fig_pie, use_container_width=True)
+        st.plotly_chart(crime_pie_figure(time_window, cluster_choice), use_container_width=True)
     
     st.markdown("#### Crime Type Statistics Table")
     
-    crime_stats = crime_df.copy()
-    crime_stats["Percentage"] = (crime_stats["crime_count"] / crime_stats["crime_count"].sum() * 100).round(2).astype(str) + "%"
-    crime_stats = crime_stats.rename(columns={"crime_type": "Crime Type", "crime_count": "Count"})
-    crime_stats = crime_stats[["Crime Type", "Count", "Percentage"]]
+    crime_stats = (
+        crime_df
+        .assign(Percentage=crime_df["crime_count"] / crime_df["crime_count"].sum() * 100)
+        .rename(columns={"crime_type": "Crime Type", "crime_count": "Count"})
+        [["Crime Type", "Count", "Percentage"]]
+    )
     
+    # Keep Percentage numeric (and sortable); the % suffix is applied at render time
     st.dataframe(
-        crime_stats.sort_values("Count", ascending=False),
+        crime_stats.sort_values("Count", ascending=False).style.format({"Percentage": "{:.2f}%"}),
         use_container_width=True,
         hide_index=True
     )
 
+with tab3:
+    render_tab3(aggregates, time_window, cluster_choice)
+
 # ============================================================================
 # TAB 4: DETAILED ANALYTICS
 # ============================================================================
 
-with tab4:
+@st.cache_data
+def arrest_figure(time_window, cluster_choice):
+    arrest_by_crime = get_all_aggregates(time_window, cluster_choice)["arrest_by_crime"]
+    
+    fig = px.bar(
+        arrest_by_crime,
+        x="crime_type",
+        y="arrest_rate",
+        color="arrest_rate",
+        color_continuous_scale="Greens",
+        labels={"crime_type": "Crime Type", "arrest_rate": "Arrest Rate (%)"},
+        height=450,
+        title="Arrest Rate by Crime Type"
+    )
+    
+    fig.update_layout(
+        xaxis_tickangle=-45,
+        hovermode="x unified",
+        font=dict(family="Segoe UI", size=11)
+    )
+    
+    return fig.to_dict()
+
+@st.cache_data
+def cluster_size_figure(time_window, cluster_choice):
+    cluster_sizes = get_all_aggregates(time_window, cluster_choice)["cluster_sizes"]
+    
+    fig = px.box(
+        cluster_sizes,
+        y="size",
+        labels={"size": "Cluster Size"},
+        height=450,
+        title="Hotspot Cluster Size Distribution"
+    )
+    
+    fig.update_layout(
+        hovermode="y unified",
+        xaxis_title="",
+        font=dict(family="Segoe UI", size=11)
+    )
+    
+    return fig.to_dict()
+
+@st.fragment
+def render_tab4(df_filtered, aggregates, total, time_window, cluster_choice):
+    cluster_sizes = aggregates["cluster_sizes"]
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("### Arrest Rate by Crime Type")
         
-        arrest_by_crime = (
-            df_filtered
-            .groupby("primary_type")
-            .agg({
-                "arrest": ["sum", "count"]
-            })
-            .reset_index()
-        )
-        
-        arrest_by_crime.columns = ["crime_type", "arrests", "total"]
-        arrest_by_crime["arrest_rate"] = (arrest_by_crime["arrests"] / arrest_by_crime["total"] * 100).round(2)
-        arrest_by_crime = arrest_by_crime.nlargest(8, "total")
-        
-        fig_arrest = px.bar(
-            arrest_by_crime,
-            x="crime_type",
-            y="arrest_rate",
-            color="arrest_rate",
-            color_continuous_scale="Greens",
-            labels={"crime_type": "Crime Type", "arrest_rate": "Arrest Rate (%)"},
-            height=450,
-            title="Arrest Rate by Crime Type"
-        )
-        
-        fig_arrest.update_layout(
-            xaxis_tickangle=-45,
-            hovermode="x unified",
-            font=dict(family="Segoe UI", size=11)
-        )
-        
-        st.plotly_chart(fig_arrest, use_container_width=True)
+        st.plotly_chart(arrest_figure(time_window, cluster_choice), use_container_width=True)
     
     with col2:
         st.markdown("### Cluster Size Distribution")
         
-        cluster_sizes = (
-            df_filtered[df_filtered["st_cluster"] != -1]
-            .groupby("st_cluster")
-            .size()
-            .reset_index(name="size")
-            .sort_values("size", ascending=False)
-        )
-        
-        fig_clusters = px.box(
-            cluster_sizes,
-            y="size",
-            labels={"size": "Cluster Size"},
-            height=450,
-            title="Hotspot Cluster Size Distribution"
-        )
-        
-        fig_clusters.update_layout(
-            hovermode="y unified",
-            xaxis_title="",
-            font=dict(family="Segoe UI", size=11)
-        )
-        
-        st.plotly_chart(fig_clusters, use_container_width=True)
+        st.plotly_chart(cluster_size_figure(time_window, cluster_choice), use_container_width=True)
     
     st.markdown("### Summary Statistics")
     
@@ -598,7 +790,8 @@ with tab4:
         st.metric("Avg Crimes/Day", f"{total/time_window:.1f}")
     
     with summary_col2:
-        peak_hour = df_filtered.groupby("hour").size().idxmax()
+        # hour_dist is a 24-slot bincount, so the argmax position is the hour
+        peak_hour = int(aggregates["hour_dist"]["count"].to_numpy().argmax())
         st.metric("Peak Hour", f"{peak_hour:02d}:00")
     
     with summary_col3:
@@ -606,7 +799,7 @@ with tab4:
         st.metric("Largest Hotspot", f"{int(max_cluster)} crimes")
     
     with summary_col4:
-        unique_crimes = df_filtered["primary_type"].nunique()
+        unique_crimes = aggregates["crime_type_count"]
         st.metric("Crime Types", unique_crimes)
     
     st.markdown("---")
@@ -615,12 +808,19 @@ with tab4:
     display_cols = ["date", "latitude", "longitude", "primary_type", "hour", "arrest", "st_cluster"]
     display_cols = [col for col in display_cols if col in df_filtered.columns]
     
+    raw_sample = df_filtered.head(100)[display_cols]
+    # Plain values travel to the browser faster than Arrow dictionary columns
+    raw_sample = raw_sample.astype({"primary_type": str, "st_cluster": int})
+    
     st.dataframe(
-        df_filtered[display_cols].head(100),
+        raw_sample,
         use_container_width=True,
         height=400
     )
 
+with tab4:
+    render_tab4(df_filtered, aggregates, total, time_window, cluster_choice)
+
 # ============================================================================
 # FOOTER
 # ============================================================================
@@ -9,9 +9,29 @@ DATA_PATH = os.path.join(
     "processed",
     "chicago_crime_with_clusters.csv"
 )
+PARQUET_PATH = os.path.splitext(DATA_PATH)[0] + ".parquet"
+
+# Columns the dashboard reads (hour and day_name are derived from date on load)
+USED_COLS = ["date", "latitude", "longitude", "primary_type", "arrest", "st_cluster"]
+
+# Stored as the dashboard uses them; categorical primary_type is written
+# dictionary-encoded and read back as category
+PARQUET_DTYPES = {
+    "latitude": "float32",
+    "longitude": "float32",
+    "primary_type": "category",
+    "arrest": "bool",
+    "st_cluster": "int32"
+}
 
 def load_data():
     return pd.read_csv(DATA_PATH)
 
 def save_data(df):
-    df.to_csv(DATA_PATH, index=False)
\ No newline at end of file
+    df.to_csv(DATA_PATH, index=False)
+
+def write_parquet(df, path=PARQUET_PATH):
+    """Write the dashboard's Parquet copy of a clustered crime frame"""
+    df = df[USED_COLS].astype(PARQUET_DTYPES)
+    df["date"] = pd.to_datetime(df["date"])
+    df.to_parquet(path, index=False, compression="zstd")
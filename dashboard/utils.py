@@ -1,29 +1,165 @@
-from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 
+DAY_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
 def apply_time_filter(df, days):
-    cutoff = datetime.now() - timedelta(days=days)
-    return df[df["date"] >= cutoff]
+    """Slice the last `days` days of records from a date-sorted frame (as returned by load_crime_data)"""
+    if df.empty:
+        return df
+    cutoff = df["date"].iloc[-1] - pd.Timedelta(days=days)
+    start = np.searchsorted(df["date"].values, np.datetime64(cutoff))
+    return df.iloc[start:]
+
+def get_cluster_stats(df):
+    """Get crime count, arrests and centroid for every cluster, noise (-1) included"""
+    return (
+        df
+        .groupby("st_cluster", observed=True, sort=False)
+        .agg(
+            count=("arrest", "size"),
+            arrests=("arrest", "sum"),
+            latitude=("latitude", "mean"),
+            longitude=("longitude", "mean")
+        )
+    )
 
-def get_overview_metrics(df):
-    total = len(df)
-    noise_pct = (df["st_cluster"] == -1).mean() * 100 if total > 0 else 0
-    hotspots = df[df["st_cluster"] != -1]["st_cluster"].nunique()
+def get_overview_metrics(cluster_stats):
+    total = int(cluster_stats["count"].sum())
+    is_hotspot = cluster_stats.index != -1
+    noise_pct = cluster_stats.loc[~is_hotspot, "count"].sum() / total * 100 if total > 0 else 0
+    hotspots = int(is_hotspot.sum())
 
     return total, hotspots, noise_pct
 
-def filter_by_cluster(df, cluster):
-    if cluster == "All":
+def build_cluster_index(df):
+    """Map each cluster to the (ascending) positions of its rows in df"""
+    clusters = df["st_cluster"].cat.categories
+    codes = df["st_cluster"].cat.codes.to_numpy()
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes, minlength=len(clusters)))[:-1]
+    return dict(zip(clusters, np.split(order, bounds)))
+
+def filter_by_cluster(df, cluster, cluster_index):
+    """Select one cluster's rows from a tail slice of the frame cluster_index was built on"""
+    if cluster == "All" or df.empty:
+        return df
+    # load_crime_data gives a RangeIndex, so the slice's first label is its offset;
+    # anything else (or a slice not running to the last row) would pick wrong rows
+    n_rows = sum(len(rows) for rows in cluster_index.values())
+    index = df.index
+    if not (isinstance(index, pd.RangeIndex) and index.step == 1 and index[-1] == n_rows - 1):
+        raise ValueError("filter_by_cluster needs a tail slice of the frame cluster_index was built on")
+    start = index[0]
+    rows = cluster_index[cluster]
+    return df.iloc[rows[np.searchsorted(rows, start):] - start]
+
+def rasterize_points(df, cmap, width=800, height=600):
+    """Shade crime points into a density image with its map corner coordinates"""
+    import datashader as ds
+    import datashader.transfer_functions as tf
+
+    lon_min, lon_max = float(df["longitude"].min()), float(df["longitude"].max())
+    lat_min, lat_max = float(df["latitude"].min()), float(df["latitude"].max())
+
+    canvas = ds.Canvas(
+        plot_width=width, plot_height=height,
+        x_range=(lon_min, lon_max), y_range=(lat_min, lat_max)
+    )
+    agg = canvas.points(df, "longitude", "latitude", ds.count())
+    # to_pil() flips rows itself (origin="lower"), so north ends up on top
+    img = tf.shade(agg, cmap=cmap, how="eq_hist").to_pil()
+
+    coordinates = [
+        [lon_min, lat_max],
+        [lon_max, lat_max],
+        [lon_max, lat_min],
+        [lon_min, lat_min]
+    ]
+
+    return img, coordinates
+
+def sample_points(df, n_max, min_per_cluster=50):
+    """Sample at most n_max rows while keeping each cluster's share of the points"""
+    if len(df) <= n_max:
         return df
-    return df[df["st_cluster"] == cluster]
+
+    shuffled = df.sample(frac=1, random_state=0)
+    codes = shuffled["st_cluster"].cat.codes.to_numpy()
+    sizes = np.bincount(codes)
+    # Every non-empty cluster gets a floor (at least one row when the budget
+    # covers them all, shrunk to fit); the rest of the budget is shared in
+    # proportion to size, handing truncated remainders to the largest fractions
+    n_clusters = np.count_nonzero(sizes)
+    per_cluster = max(1, min(min_per_cluster, n_max // n_clusters)) if n_max >= n_clusters else 0
+    floor = np.minimum(sizes, per_cluster)
+    rest = sizes - floor
+    share = rest * ((n_max - floor.sum()) / rest.sum())
+    quota = floor + np.floor(share).astype(int)
+    remainders = share - np.floor(share)
+    quota[np.argsort(-remainders, kind="stable")[:n_max - quota.sum()]] += 1
+    rank = shuffled.groupby(codes).cumcount().to_numpy()
+
+    return shuffled[rank < quota[codes]]
+
+def get_spatial_bins(df, cell_size=0.005):
+    """Get crime count and arrest rate per square lat/lon grid cell (~500 m at 0.005 deg)"""
+    cells = pd.DataFrame({
+        "lat_idx": np.floor(df["latitude"].to_numpy() / cell_size).astype(np.int64),
+        "lon_idx": np.floor(df["longitude"].to_numpy() / cell_size).astype(np.int64),
+        "arrest": df["arrest"].to_numpy()
+    })
+
+    bins = (
+        cells
+        .groupby(["lat_idx", "lon_idx"], sort=False)["arrest"]
+        .agg(count="size", arrest_rate="mean")
+        .reset_index()
+    )
+    bins["arrest_rate"] = bins["arrest_rate"] * 100
+    bins["cell_id"] = bins["lat_idx"].astype(str) + "_" + bins["lon_idx"].astype(str)
+    bins["latitude"] = (bins["lat_idx"] + 0.5) * cell_size
+    bins["longitude"] = (bins["lon_idx"] + 0.5) * cell_size
+
+    return bins
+
+def get_grid_geojson(bins, cell_size=0.005):
+    """Build square GeoJSON polygons, keyed by cell_id, for get_spatial_bins output"""
+    features = []
+    for cell_id, lat_idx, lon_idx in zip(bins["cell_id"], bins["lat_idx"], bins["lon_idx"]):
+        lat0, lon0 = round(lat_idx * cell_size, 6), round(lon_idx * cell_size, 6)
+        lat1, lon1 = round(lat0 + cell_size, 6), round(lon0 + cell_size, 6)
+        features.append({
+            "type": "Feature",
+            "id": cell_id,
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[[lon0, lat0], [lon1, lat0], [lon1, lat1], [lon0, lat1], [lon0, lat0]]]
+            }
+        })
+
+    return {"type": "FeatureCollection", "features": features}
 
 def hourly_distribution(df):
-    return df.groupby("hour").size().reset_index(name="count")
+    return df["hour"].value_counts().sort_index().rename_axis("hour").reset_index(name="count")
 
-def top_crime_types(df, top_n=5):
-    vc = df["primary_type"].value_counts().head(top_n)
+def get_crime_type_stats(df):
+    """Get crime count, arrests and arrest rate for every crime type in one pass"""
+    # Count per category code directly; only types present in df are kept
+    types = df["primary_type"].cat.categories
+    codes = df["primary_type"].cat.codes.to_numpy()
+    total = np.bincount(codes, minlength=len(types))
+    arrests = np.bincount(codes, weights=df["arrest"].to_numpy(), minlength=len(types)).astype(np.int64)
+    present = total > 0
+    crime_stats = pd.DataFrame(
+        {"arrests": arrests[present], "total": total[present]},
+        index=types[present].rename("primary_type")
+    )
+    crime_stats["arrest_rate"] = (crime_stats["arrests"] / crime_stats["total"] * 100).round(2)
+    return crime_stats
 
-    crime_df = vc.reset_index()
+def top_crime_types(crime_stats, top_n=5):
+    crime_df = crime_stats["total"].nlargest(top_n).reset_index()
     crime_df.columns = ["crime_type", "crime_count"]
 
     return crime_df
@@ -33,57 +169,46 @@ def arrest_rate(df):
         return 0
     return df["arrest"].mean() * 100
 
-def get_cluster_hotspots(df):
+def get_cluster_hotspots(cluster_stats):
     """Get top hotspots with crime stats"""
-    if "st_cluster" not in df.columns:
-        return pd.DataFrame()
-    
+    hotspot_stats = cluster_stats[cluster_stats.index != -1]
     hotspot_stats = (
-        df[df["st_cluster"] != -1]
-        .groupby("st_cluster")
-        .agg({
-            "latitude": "mean",
-            "longitude": "mean",
-            "primary_type": "count",
-            "arrest": "mean"
-        })
+        hotspot_stats
+        .assign(arrest_rate=hotspot_stats["arrests"] / hotspot_stats["count"] * 100)
         .reset_index()
-        .rename(columns={"primary_type": "count", "arrest": "arrest_rate"})
+        [["st_cluster", "latitude", "longitude", "count", "arrest_rate"]]
     )
     
-    hotspot_stats["arrest_rate"] = hotspot_stats["arrest_rate"] * 100
-    hotspot_stats = hotspot_stats.sort_values("count", ascending=False)
-    
-    return hotspot_stats
+    return hotspot_stats.sort_values("count", ascending=False)
 
 def get_daily_crime_trend(df):
     """Get daily crime trend"""
     daily_df = (
         df
-        .groupby(df["date"].dt.date)
+        .groupby("date_ordinal", sort=True)
         .size()
-        .reset_index(name="count")
+        .reset_index(name="crimes")
     )
-    daily_df.columns = ["date", "crimes"]
+    daily_df.insert(0, "date", pd.to_datetime(daily_df.pop("date_ordinal"), unit="D"))
     return daily_df
 
 def get_hour_crime_distribution(df):
     """Get crime distribution by hour of day"""
-    hour_dist = df.groupby("hour").size().reset_index(name="count")
+    counts = np.bincount(df["hour"].to_numpy(), minlength=24)
+    hour_dist = pd.DataFrame({"hour": np.arange(24), "count": counts})
     hour_dist["hour_label"] = hour_dist["hour"].astype(str) + ":00"
     return hour_dist
 
 def get_day_week_distribution(df):
     """Get crime distribution by day of week"""
-    day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    day_dist = df.groupby("day_name").size().reset_index(name="count")
-    day_dist["day_name"] = pd.Categorical(day_dist["day_name"], categories=day_order, ordered=True)
-    return day_dist.sort_values("day_name")
+    counts = np.bincount(df["day_name"].cat.codes.to_numpy(), minlength=7)
+    return pd.DataFrame({"day_name": DAY_ORDER, "count": counts})
 
-def get_arrest_statistics(df):
+def get_arrest_statistics(crime_stats):
     """Get arrest statistics"""
-    total_arrests = df["arrest"].sum() if "arrest" in df.columns else 0
-    arrest_pct = (total_arrests / len(df) * 100) if len(df) > 0 else 0
+    total_arrests = crime_stats["arrests"].sum()
+    total = crime_stats["total"].sum()
+    arrest_pct = (total_arrests / total * 100) if total > 0 else 0
     
     return {
         "total_arrests": int(total_arrests),
@@ -108,3 +233,41 @@ def get_location_stats(df):
         "lat_range": lat_range,
         "lon_range": lon_range
     }
+
+def get_day_hour_heatmap(df):
+    """Get a 7x24 array of crime counts, rows in DAY_ORDER and columns by hour"""
+    # day_name codes follow DAY_ORDER; widen from int8 before combining
+    dow = df["day_name"].cat.codes.to_numpy().astype(np.intp)
+    hour = df["hour"].to_numpy().astype(np.intp)
+    return np.bincount(dow * 24 + hour, minlength=7 * 24).reshape(7, 24)
+
+def get_arrest_by_crime_type(crime_stats, top_n=8):
+    """Get arrest rate for the most frequent crime types"""
+    arrest_by_crime = crime_stats.nlargest(top_n, "total").reset_index()
+    arrest_by_crime = arrest_by_crime.rename(columns={"primary_type": "crime_type"})
+    return arrest_by_crime[["crime_type", "arrests", "total", "arrest_rate"]]
+
+def get_cluster_sizes(cluster_stats):
+    """Get number of crimes in each hotspot, largest first"""
+    sizes = cluster_stats.loc[cluster_stats.index != -1, "count"]
+    return sizes.sort_values(ascending=False).rename_axis("st_cluster").reset_index(name="size")
+
+def build_aggregates(df):
+    """Compute every aggregate the dashboard tabs need for one filtered frame"""
+    crime_stats = get_crime_type_stats(df)
+    cluster_stats = get_cluster_stats(df)
+
+    return {
+        "heatmap": get_day_hour_heatmap(df),
+        "hour_dist": get_hour_crime_distribution(df),
+        "day_dist": get_day_week_distribution(df),
+        "daily_trend": get_daily_crime_trend(df),
+        "crime_df": top_crime_types(crime_stats, top_n=10),
+        "arrest_by_crime": get_arrest_by_crime_type(crime_stats),
+        "arrest_stats": get_arrest_statistics(crime_stats),
+        # crime_stats has one row per crime type present
+        "crime_type_count": len(crime_stats),
+        "cluster_sizes": get_cluster_sizes(cluster_stats),
+        "hotspots": get_cluster_hotspots(cluster_stats),
+        "overview": get_overview_metrics(cluster_stats)
+    }
@@ -0,0 +1,16 @@
+import pandas as pd
+import os
+import sys
+
+# Share the column list and dtypes with the dashboard loader
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dashboard"))
+from storage import DATA_PATH, PARQUET_PATH, USED_COLS, write_parquet
+
+
+if __name__ == "__main__":
+    print("Converting crime data to Parquet...")
+
+    df = pd.read_csv(DATA_PATH, usecols=USED_COLS, parse_dates=["date"])
+    write_parquet(df)
+
+    print("Parquet saved to:", PARQUET_PATH)
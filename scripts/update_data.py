@@ -4,6 +4,9 @@ from sklearn.cluster import DBSCAN
 from sklearn.preprocessing import StandardScaler
 from datetime import datetime
 import os
+
+from build_parquet import write_parquet
+
 API_URL = "https://data.cityofchicago.org/resource/ijzp-q8t2.json?$limit=10000"
 
 print("Fetching new crime data...")
@@ -67,5 +70,12 @@ df.to_csv(output_path, index=False)
 
 print("Dataset saved to:", output_path)
 
+# Keep the dashboard's Parquet copy in sync
+parquet_path = os.path.splitext(output_path)[0] + ".parquet"
+
+write_parquet(df, parquet_path)
+
+print("Parquet saved to:", parquet_path)
+
 print("Dataset updated successfully")
 print("Update time:", datetime.now())
\ No newline at end of file